@@ -15,9 +15,11 @@ class Settings:
     
     # GitHub
     GITHUB_TOKEN: str = os.getenv("GITHUB_TOKEN", "")
+    GITHUB_CACHE_TTL: int = int(os.getenv("GITHUB_CACHE_TTL", "3600"))  # seconds
     
     # App
     APP_NAME: str = "RepoScraper"
+    READ_CACHE_TTL: int = int(os.getenv("READ_CACHE_TTL", "120"))  # seconds
     DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
 
 
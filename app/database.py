@@ -2,9 +2,10 @@
 
 import os
 from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import bindparam, create_engine, event, inspect, select, text, update, Column, Integer, String, Float, DateTime, ForeignKey, Index, Text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, deferred
+from sqlalchemy.pool import QueuePool
 
 # Use PostgreSQL if DATABASE_URL is set (Render/Railway), otherwise SQLite for local dev
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./reposcraper.db")
@@ -13,11 +14,44 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./reposcraper.db")
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
+# Explicit connection pool so requests reuse connections instead of reopening them
+POOL_OPTIONS = {
+    "poolclass": QueuePool,
+    "pool_size": 10,
+    "max_overflow": 20,
+    "pool_timeout": 30,
+    "pool_pre_ping": True,
+    "pool_recycle": 1800,
+}
+
 # SQLite needs special args, PostgreSQL doesn't
 if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False}, **POOL_OPTIONS)
+
+    # WAL + relaxed fsync so writers don't block readers; applied per DBAPI connection
+    SQLITE_PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA busy_timeout=5000",
+        "PRAGMA cache_size=-20000",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA foreign_keys=ON",
+    )
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragma(dbapi_conn, _):
+        """Apply SQLite tuning pragmas to every new connection."""
+        cursor = dbapi_conn.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+        
+        # SQLite's built-in lower() only folds ASCII; match Python's str.lower used for search terms
+        dbapi_conn.create_function(
+            "lower", 1, lambda value: value.lower() if value is not None else None, deterministic=True
+        )
 else:
-    engine = create_engine(DATABASE_URL)
+    engine = create_engine(DATABASE_URL, **POOL_OPTIONS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -30,16 +64,22 @@ class Repository(Base):
     name = Column(String(255), nullable=False)
     full_name = Column(String(512), unique=True, nullable=False)  # owner/repo
     url = Column(String(1024), nullable=False)
-    language = Column(String(100))
-    stars = Column(Integer, default=0)
+    language = Column(String(100), index=True)
+    stars = Column(Integer, default=0, index=True)
     description = Column(Text)
     readme_content = Column(Text)
+    file_tree_json = deferred(Column(Text))  # JSON list of paths, loaded only when accessed
     last_indexed = Column(DateTime, default=datetime.utcnow)
     
     # Relationship to architecture tags
     architecture_tags = relationship("ArchitectureTag", back_populates="repository", cascade="all, delete-orphan")
 
 
+def _normalize_tag(context):
+    """Column default: lowercase copy of the tag being inserted."""
+    return (context.get_current_parameters().get("tag") or "").lower()
+
+
 class ArchitectureTag(Base):
     """Architecture tags detected for repositories."""
     __tablename__ = "architecture_tags"
@@ -47,6 +87,7 @@ class ArchitectureTag(Base):
     id = Column(Integer, primary_key=True, index=True)
     repo_id = Column(Integer, ForeignKey("repositories.id"), nullable=False)
     tag = Column(String(255), nullable=False)
+    tag_normalized = Column(String(255), index=True, default=_normalize_tag)  # lowercased tag for search
     tag_type = Column(String(100))  # architectural_pattern, design_pattern, infrastructure, framework
     confidence_score = Column(Float, default=0.0)
     detection_method = Column(String(100), default="gpt5")  # gpt5, heuristic, manual
@@ -54,10 +95,58 @@ class ArchitectureTag(Base):
     # Relationship back to repository
     repository = relationship("Repository", back_populates="architecture_tags")
 
+    __table_args__ = (
+        Index("ix_tag_type_tag", "tag_type", "tag"),
+        Index("ix_tag_repo_conf", "repo_id", "confidence_score"),
+        Index("ix_tag_name", "tag"),
+    )
+
+
+class AnalysisCache(Base):
+    """Cached GPT analysis results keyed by a hash of the analyzed content."""
+    __tablename__ = "analysis_cache"
+
+    key = Column(String(64), primary_key=True)  # sha256 hex digest
+    result_json = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 
 def init_db():
     """Initialize the database, creating all tables."""
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    
+    # Backfill tags stored before tag_normalized existed, with the same str.lower as new inserts
+    with engine.begin() as conn:
+        rows = conn.execute(
+            select(ArchitectureTag.id, ArchitectureTag.tag).where(ArchitectureTag.tag_normalized.is_(None))
+        ).all()
+        if rows:
+            conn.execute(
+                update(ArchitectureTag.__table__)
+                .where(ArchitectureTag.__table__.c.id == bindparam("tag_id"))
+                .values(tag_normalized=bindparam("normalized")),
+                [{"tag_id": row.id, "normalized": row.tag.lower()} for row in rows]
+            )
+    
+    # create_all skips indexes on tables that already exist, so add any missing ones
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def _add_missing_columns():
+    """Add columns introduced after a table was created, since create_all never alters tables."""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
 
 
 def get_db():
@@ -1,18 +1,24 @@
 """FastAPI application for RepoScraper - Code Architecture Search Tool."""
 
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from fastapi import FastAPI, Depends, HTTPException, Query
+from cachetools import TTLCache
+from fastapi import FastAPI, BackgroundTasks, Depends, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import case, exists, func, insert, literal, or_
+from sqlalchemy.orm import Session, selectinload
 from typing import Optional
 
 from app.config import settings
 
 # Static files directory
 STATIC_DIR = Path(__file__).parent / "static"
-from app.database import init_db, get_db, Repository, ArchitectureTag
+from app.database import init_db, get_db, SessionLocal, Repository, ArchitectureTag
 from app.schemas import (
     RepositoryResponse,
     GitHubSearchParams,
@@ -20,8 +26,8 @@ from app.schemas import (
     SearchResult,
     AnalysisResult
 )
-from app.services.github_service import github_service
-from app.services.analysis_service import analysis_service
+from app.services.github_service import GitHubService, get_github_service
+from app.services.analysis_service import AnalysisService, get_analysis_service
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -42,6 +48,33 @@ app.add_middleware(
 # Mount static files
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
+# Short-lived cache for read-only endpoints, cleared whenever ingestion writes.
+# The generation counter lets a read that started before a clear skip storing its stale result.
+_read_cache = TTLCache(maxsize=256, ttl=settings.READ_CACHE_TTL)
+_read_cache_lock = threading.Lock()
+_read_cache_generation = 0
+
+
+def _read_cache_get(key: tuple) -> tuple:
+    """Return (cached endpoint result or None, current cache generation)."""
+    with _read_cache_lock:
+        return _read_cache.get(key), _read_cache_generation
+
+
+def _read_cache_set(key: tuple, value, generation: int) -> None:
+    """Store a serialized endpoint result unless the cache was cleared since generation."""
+    with _read_cache_lock:
+        if generation == _read_cache_generation:
+            _read_cache[key] = value
+
+
+def _read_cache_clear() -> None:
+    """Invalidate all cached read results after the data changes."""
+    global _read_cache_generation
+    with _read_cache_lock:
+        _read_cache.clear()
+        _read_cache_generation += 1
+
 
 @app.get("/")
 async def serve_frontend():
@@ -78,11 +111,12 @@ async def debug_config():
 # --- GitHub Endpoints ---
 
 @app.get("/api/github/search")
-async def search_github(
+def search_github(
     language: Optional[str] = None,
     min_stars: int = Query(default=100, ge=0),
     max_results: int = Query(default=20, ge=1, le=100),
-    query: Optional[str] = None
+    query: Optional[str] = None,
+    github_service: GitHubService = Depends(get_github_service)
 ):
     """
     Search GitHub for repositories matching criteria.
@@ -98,7 +132,11 @@ async def search_github(
 
 
 @app.get("/api/github/repo/{owner}/{repo}")
-async def get_github_repo(owner: str, repo: str):
+def get_github_repo(
+    owner: str,
+    repo: str,
+    github_service: GitHubService = Depends(get_github_service)
+):
     """Get a specific repository from GitHub."""
     full_name = f"{owner}/{repo}"
     repo_data = github_service.get_repository(full_name)
@@ -111,31 +149,88 @@ async def get_github_repo(owner: str, repo: str):
 
 # --- Repository Ingestion & Analysis ---
 
+def _analysis_to_tag_rows(repo_id: int, analysis: AnalysisResult) -> list[dict]:
+    """Flatten an analysis result into architecture_tags rows for bulk insert."""
+    rows = []
+    for pattern in analysis.architectural_patterns:
+        rows.append({"tag": pattern.name, "tag_type": "architectural_pattern", "confidence_score": pattern.confidence})
+    for pattern in analysis.design_patterns:
+        rows.append({"tag": pattern.name, "tag_type": "design_pattern", "confidence_score": pattern.confidence})
+    for infra in analysis.infrastructure:
+        rows.append({"tag": infra.approach, "tag_type": "infrastructure", "confidence_score": infra.confidence})
+    for framework in analysis.frameworks:
+        rows.append({"tag": framework, "tag_type": "framework", "confidence_score": 1.0})
+    
+    for row in rows:
+        row["repo_id"] = repo_id
+        row["detection_method"] = "gpt5"
+    return rows
+
+
+def _analyze_and_store_tags(
+    repo_id: int,
+    readme: str,
+    full_name: str,
+    file_tree: list[str],
+    analysis_service: AnalysisService
+) -> None:
+    """Background task: run the GPT analysis for an ingested repo and store its tags."""
+    try:
+        analysis = analysis_service.analyze_architecture(readme, full_name, file_tree)
+    except Exception as e:
+        print(f"Analysis failed for {full_name}: {e}")
+        return
+    
+    tag_rows = _analysis_to_tag_rows(repo_id, analysis)
+    if not tag_rows:
+        return
+    
+    # Runs after the request's session is closed, so use a dedicated one
+    with SessionLocal() as db:
+        db.execute(insert(ArchitectureTag), tag_rows)
+        db.commit()
+    _read_cache_clear()
+
+
 @app.post("/api/repos/ingest/{owner}/{repo}", response_model=RepositoryResponse)
-async def ingest_repository(
+def ingest_repository(
     owner: str,
     repo: str,
+    background_tasks: BackgroundTasks,
+    response: Response,
     analyze: bool = Query(default=True, description="Run GPT-5 analysis after ingestion"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    github_service: GitHubService = Depends(get_github_service),
+    analysis_service: AnalysisService = Depends(get_analysis_service)
 ):
     """
     Ingest a repository from GitHub into the database and optionally analyze it.
+    Analysis runs in the background; the response is 202 while it is pending.
     """
     full_name = f"{owner}/{repo}"
     
-    # Check if already exists
-    existing = db.query(Repository).filter(Repository.full_name == full_name).first()
-    if existing:
-        return existing
+    # Check if already exists without loading the row (and its README) unless it does
+    already_indexed = db.query(exists().where(Repository.full_name == full_name)).scalar()
+    if already_indexed:
+        return (
+            db.query(Repository)
+            .options(selectinload(Repository.architecture_tags))
+            .filter(Repository.full_name == full_name)
+            .first()
+        )
+    
+    # Fetch metadata, README and (if analyzing) the file tree from GitHub concurrently
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        repo_future = pool.submit(github_service.get_repository, full_name)
+        readme_future = pool.submit(github_service.get_readme_content, full_name)
+        tree_future = pool.submit(github_service.get_file_tree, full_name) if analyze else None
+        repo_data = repo_future.result()
+        readme = readme_future.result()
+        file_tree = tree_future.result() if tree_future else []
     
-    # Fetch from GitHub
-    repo_data = github_service.get_repository(full_name)
     if not repo_data:
         raise HTTPException(status_code=404, detail="Repository not found on GitHub")
     
-    # Get README
-    readme = github_service.get_readme_content(full_name)
-    
     # Create repository record
     db_repo = Repository(
         name=repo_data["name"],
@@ -144,74 +239,33 @@ async def ingest_repository(
         language=repo_data["language"],
         stars=repo_data["stars"],
         description=repo_data["description"],
-        readme_content=readme
+        readme_content=readme,
+        file_tree_json=json.dumps(file_tree) if file_tree else None
     )
     db.add(db_repo)
     db.commit()
     db.refresh(db_repo)
+    _read_cache_clear()
     
-    # Run analysis if requested
+    # Queue analysis if requested; tags appear once it finishes
     if analyze and readme:
         if not settings.OPENAI_API_KEY:
             raise HTTPException(status_code=500, detail="OPENAI_API_KEY not configured on server")
         
-        file_tree = github_service.get_file_tree(full_name)
-        try:
-            analysis = analysis_service.analyze_architecture(readme, full_name, file_tree)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
-        
-        # Store architecture tags
-        for pattern in analysis.architectural_patterns:
-            tag = ArchitectureTag(
-                repo_id=db_repo.id,
-                tag=pattern["name"],
-                tag_type="architectural_pattern",
-                confidence_score=pattern["confidence"],
-                detection_method="gpt5"
-            )
-            db.add(tag)
-        
-        for pattern in analysis.design_patterns:
-            tag = ArchitectureTag(
-                repo_id=db_repo.id,
-                tag=pattern["name"],
-                tag_type="design_pattern",
-                confidence_score=pattern["confidence"],
-                detection_method="gpt5"
-            )
-            db.add(tag)
-        
-        for infra in analysis.infrastructure:
-            tag = ArchitectureTag(
-                repo_id=db_repo.id,
-                tag=infra["approach"],
-                tag_type="infrastructure",
-                confidence_score=infra["confidence"],
-                detection_method="gpt5"
-            )
-            db.add(tag)
-        
-        for framework in analysis.frameworks:
-            tag = ArchitectureTag(
-                repo_id=db_repo.id,
-                tag=framework,
-                tag_type="framework",
-                confidence_score=1.0,
-                detection_method="gpt5"
-            )
-            db.add(tag)
-        
-        db.commit()
-        db.refresh(db_repo)
+        background_tasks.add_task(
+            _analyze_and_store_tags, db_repo.id, readme, full_name, file_tree, analysis_service
+        )
+        response.status_code = 202
     
     return db_repo
 
 
 @app.post("/api/repos/analyze/{repo_id}", response_model=AnalysisResult)
-async def analyze_repository(
+def analyze_repository(
     repo_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    github_service: GitHubService = Depends(get_github_service),
+    analysis_service: AnalysisService = Depends(get_analysis_service)
 ):
     """Re-analyze an existing repository with GPT-5."""
     repo = db.query(Repository).filter(Repository.id == repo_id).first()
@@ -221,7 +275,15 @@ async def analyze_repository(
     if not repo.readme_content:
         raise HTTPException(status_code=400, detail="Repository has no README content")
     
-    file_tree = github_service.get_file_tree(repo.full_name)
+    # Reuse the tree stored at ingest; fetch (and keep) it only for repos ingested without one
+    if repo.file_tree_json:
+        file_tree = json.loads(repo.file_tree_json)
+    else:
+        file_tree = github_service.get_file_tree(repo.full_name)
+        if file_tree:
+            repo.file_tree_json = json.dumps(file_tree)
+            db.commit()
+    
     analysis = analysis_service.analyze_architecture(
         repo.readme_content,
         repo.full_name,
@@ -234,14 +296,19 @@ async def analyze_repository(
 # --- Search & Query ---
 
 @app.get("/api/repos", response_model=list[RepositoryResponse])
-async def list_repositories(
+def list_repositories(
     language: Optional[str] = None,
     min_stars: int = 0,
     limit: int = Query(default=50, ge=1, le=200),
     db: Session = Depends(get_db)
 ):
     """List all indexed repositories with optional filters."""
-    query = db.query(Repository)
+    cache_key = ("repos", language, min_stars, limit)
+    cached, generation = _read_cache_get(cache_key)
+    if cached is not None:
+        return cached
+    
+    query = db.query(Repository).options(selectinload(Repository.architecture_tags))
     
     if language:
         query = query.filter(Repository.language.ilike(f"%{language}%"))
@@ -250,20 +317,28 @@ async def list_repositories(
         query = query.filter(Repository.stars >= min_stars)
     
     repos = query.order_by(Repository.stars.desc()).limit(limit).all()
-    return repos
+    
+    result = [RepositoryResponse.model_validate(repo) for repo in repos]
+    _read_cache_set(cache_key, result, generation)
+    return result
 
 
 @app.get("/api/repos/{repo_id}", response_model=RepositoryResponse)
-async def get_repository(repo_id: int, db: Session = Depends(get_db)):
+def get_repository(repo_id: int, db: Session = Depends(get_db)):
     """Get a specific repository by ID."""
-    repo = db.query(Repository).filter(Repository.id == repo_id).first()
+    repo = (
+        db.query(Repository)
+        .options(selectinload(Repository.architecture_tags))
+        .filter(Repository.id == repo_id)
+        .first()
+    )
     if not repo:
         raise HTTPException(status_code=404, detail="Repository not found")
     return repo
 
 
 @app.get("/api/search")
-async def search_by_architecture(
+def search_by_architecture(
     query: str = Query(..., description="Search query like 'microservices python'"),
     min_confidence: float = Query(default=0.5, ge=0, le=1),
     limit: int = Query(default=20, ge=1, le=100),
@@ -275,77 +350,113 @@ async def search_by_architecture(
     """
     # Parse query terms
     terms = query.lower().split()
+    if not terms:
+        return []
     
-    # Search in architecture tags
-    results = []
-    repos = db.query(Repository).all()
+    cache_key = ("search", tuple(terms), min_confidence, limit)
+    cached, generation = _read_cache_get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Per-repo tag score: each tag adds its confidence once per term it matches
+    normalized_tag_col = ArchitectureTag.tag_normalized
+    # Escape the stored tag before using it as a LIKE pattern so "_" and "%" match literally
+    tag_pattern = func.replace(
+        func.replace(func.replace(normalized_tag_col, "\\", "\\\\"), "%", "\\%"), "_", "\\_"
+    )
+    term_matches = [
+        or_(
+            normalized_tag_col.contains(term, autoescape=True),
+            literal(term).like(literal("%") + tag_pattern + literal("%"), escape="\\")
+        )
+        for term in terms
+    ]
+    tag_scores = (
+        db.query(
+            ArchitectureTag.repo_id,
+            func.sum(sum(
+                case((match, ArchitectureTag.confidence_score), else_=0.0)
+                for match in term_matches
+            )).label("tag_score")
+        )
+        .filter(ArchitectureTag.confidence_score >= min_confidence, or_(*term_matches))
+        .group_by(ArchitectureTag.repo_id)
+        .subquery()
+    )
+    
+    # Language and description bonuses
+    language_score = case((func.lower(Repository.language).in_(terms), 0.5), else_=0.0)
+    desc_lower = func.lower(Repository.description)
+    description_score = sum(
+        case((desc_lower.contains(term, autoescape=True), 0.2), else_=0.0)
+        for term in terms
+    )
+    relevance = func.coalesce(tag_scores.c.tag_score, 0.0) + language_score + description_score
+    
+    rows = (
+        db.query(Repository, relevance.label("relevance_score"))
+        .outerjoin(tag_scores, tag_scores.c.repo_id == Repository.id)
+        .options(selectinload(Repository.architecture_tags))
+        .filter(relevance > 0)
+        .order_by(relevance.desc(), Repository.id)
+        .limit(limit)
+        .all()
+    )
+    
+    # A tag matches if it contains any term (one compiled scan) or is contained in one
+    term_pattern = re.compile("|".join(map(re.escape, terms)))
+    joined_terms = "\0".join(terms)
     
-    for repo in repos:
-        score = 0.0
+    results = []
+    for repo, score in rows:
         matched_tags = []
-        
-        # Check architecture tags
         for tag in repo.architecture_tags:
             if tag.confidence_score < min_confidence:
                 continue
             
-            tag_lower = tag.tag.lower()
-            for term in terms:
-                if term in tag_lower or tag_lower in term:
-                    score += tag.confidence_score
-                    matched_tags.append(tag.tag)
-        
-        # Check language
-        if repo.language and repo.language.lower() in terms:
-            score += 0.5
+            tag_lower = tag.tag_normalized or ""
+            if term_pattern.search(tag_lower) or tag_lower in joined_terms:
+                matched_tags.append(tag.tag)
         
-        # Check description
-        if repo.description:
-            desc_lower = repo.description.lower()
-            for term in terms:
-                if term in desc_lower:
-                    score += 0.2
-        
-        if score > 0:
-            results.append({
-                "repository": repo,
-                "relevance_score": score,
-                "matched_tags": matched_tags
-            })
-    
-    # Sort by relevance
-    results.sort(key=lambda x: x["relevance_score"], reverse=True)
+        results.append({
+            "repository": RepositoryResponse.model_validate(repo),
+            "relevance_score": score,
+            "matched_tags": matched_tags
+        })
     
-    return results[:limit]
+    _read_cache_set(cache_key, results, generation)
+    return results
 
 
 @app.get("/api/tags")
-async def list_tags(
+def list_tags(
     tag_type: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """List all unique architecture tags in the database."""
-    query = db.query(ArchitectureTag)
+    cache_key = ("tags", tag_type)
+    cached, generation = _read_cache_get(cache_key)
+    if cached is not None:
+        return cached
+    
+    query = db.query(
+        ArchitectureTag.tag,
+        ArchitectureTag.tag_type,
+        func.count().label("count"),
+        func.avg(ArchitectureTag.confidence_score).label("avg_confidence")
+    )
     
     if tag_type:
         query = query.filter(ArchitectureTag.tag_type == tag_type)
     
-    tags = query.all()
-    
-    # Aggregate tags
-    tag_counts = {}
-    for tag in tags:
-        key = (tag.tag, tag.tag_type)
-        if key not in tag_counts:
-            tag_counts[key] = {"tag": tag.tag, "type": tag.tag_type, "count": 0, "avg_confidence": 0}
-        tag_counts[key]["count"] += 1
-        tag_counts[key]["avg_confidence"] += tag.confidence_score
-    
-    # Calculate averages
-    for key in tag_counts:
-        tag_counts[key]["avg_confidence"] /= tag_counts[key]["count"]
+    rows = query.group_by(ArchitectureTag.tag, ArchitectureTag.tag_type).all()
     
-    return list(tag_counts.values())
+    result = [
+        {"tag": row.tag, "type": row.tag_type, "count": row.count, "avg_confidence": row.avg_confidence}
+        for row in rows
+    ]
+    _read_cache_set(cache_key, result, generation)
+    return result
 
 
 if __name__ == "__main__":
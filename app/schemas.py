@@ -69,9 +69,19 @@ class GitHubSearchParams(BaseModel):
 
 # --- Analysis Schemas ---
 
+class PatternConfidence(BaseModel):
+    name: str
+    confidence: float  # 0.0-1.0
+
+
+class InfrastructureConfidence(BaseModel):
+    approach: str
+    confidence: float  # 0.0-1.0
+
+
 class AnalysisResult(BaseModel):
-    architectural_patterns: list[dict]  # [{"name": "...", "confidence": 0.0-1.0}]
-    design_patterns: list[dict]
-    infrastructure: list[dict]
+    architectural_patterns: list[PatternConfidence]
+    design_patterns: list[PatternConfidence]
+    infrastructure: list[InfrastructureConfidence]
     frameworks: list[str]
     summary: str
@@ -1,12 +1,68 @@
 """GPT-5 powered architectural analysis service."""
 
-import json
+import hashlib
+import re
+from functools import lru_cache
 from typing import Optional
 from openai import OpenAI
+from sqlalchemy.exc import SQLAlchemyError
 
 from app.config import settings
+from app.database import SessionLocal, AnalysisCache
 from app.schemas import AnalysisResult
 
+# Path tokens that indicate each heuristic pattern. *_DIR_INDICATORS only count
+# when they name a directory (the old "services/" and "functions/" checks).
+MICROSERVICES_DIR_INDICATORS = {"services", "microservices"}
+MICROSERVICES_INDICATORS = {"api-gateway"}
+EVENT_DRIVEN_INDICATORS = {
+    "kafka", "rabbitmq", "event", "events", "message", "messages", "messaging", "queue", "queues"
+}
+KUBERNETES_INDICATORS = {"kubernetes", "k8s", "helm"}
+CLEAN_ARCHITECTURE_INDICATORS = {"domain", "application", "infrastructure"}
+SERVERLESS_DIR_INDICATORS = {"functions"}
+SERVERLESS_INDICATORS = {"serverless", "lambda"}
+
+_WORD_SEPARATORS = re.compile(r"[-_.\s]+")
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+
+def _component_tokens(component: str) -> set[str]:
+    """Lowercased tokens for one path component.
+
+    "api-gateway.yaml" -> api-gateway.yaml, api-gateway, api, gateway, yaml;
+    "KafkaConsumer.java" -> kafkaconsumer.java, kafkaconsumer, kafka, consumer, java
+    """
+    tokens = {component.lower(), component.split(".", 1)[0].lower()}
+    for part in _WORD_SEPARATORS.split(component):
+        tokens.update(word.lower() for word in _CAMEL_BOUNDARY.split(part) if word)
+    return tokens
+
+
+# Identifies the prompt below; bump it whenever SYSTEM_PROMPT changes
+PROMPT_CACHE_KEY = "arch-analysis-v1"
+
+# Kept byte-for-byte identical across calls so the provider can reuse the cached prefix;
+# only the per-repository context goes in the user message
+SYSTEM_PROMPT = """You are an expert software architect. Analyze repositories and return structured JSON.
+Your task is to identify architectural patterns, design patterns, infrastructure approaches, and frameworks used.
+Be specific and provide confidence scores between 0.0 and 1.0 based on evidence found.
+
+For the repository in the user message, identify:
+- Architectural patterns (microservices, monolith, serverless, event-driven, hexagonal, clean architecture, etc.)
+- Design patterns mentioned or evident (repository pattern, factory, singleton, observer, etc.)
+- Infrastructure approach (containerized, cloud-native, kubernetes, serverless, etc.)
+- Notable frameworks or libraries
+
+Return JSON with this exact structure:
+{
+    "architectural_patterns": [{"name": "pattern name", "confidence": 0.0-1.0}],
+    "design_patterns": [{"name": "pattern name", "confidence": 0.0-1.0}],
+    "infrastructure": [{"approach": "approach name", "confidence": 0.0-1.0}],
+    "frameworks": ["framework1", "framework2"],
+    "summary": "Brief 1-2 sentence summary of the architecture"
+}"""
+
 
 class AnalysisService:
     """Service for analyzing repository architecture using GPT-5."""
@@ -32,6 +88,12 @@ class AnalysisService:
         Returns:
             AnalysisResult with detected patterns and confidence scores
         """
+        # Same repo name, README and file tree means an identical prompt, so reuse the stored result
+        cache_key = self._cache_key(repo_name, readme_content, file_tree)
+        cached = self._get_cached(cache_key)
+        if cached:
+            return cached
+        
         # Build context with file tree if available
         context = f"Repository: {repo_name}\n\n"
         
@@ -42,44 +104,49 @@ class AnalysisService:
         
         context += f"README Content:\n{readme_content[:8000]}"  # Limit README size
 
-        response = self.client.chat.completions.create(
+        # Structured outputs: the SDK validates the response straight into AnalysisResult
+        response = self.client.chat.completions.parse(
             model=self.model,
-            response_format={"type": "json_object"},
+            response_format=AnalysisResult,
             messages=[
-                {
-                    "role": "system",
-                    "content": """You are an expert software architect. Analyze repositories and return structured JSON.
-Your task is to identify architectural patterns, design patterns, infrastructure approaches, and frameworks used.
-Be specific and provide confidence scores between 0.0 and 1.0 based on evidence found."""
-                },
-                {
-                    "role": "user",
-                    "content": f"""Analyze this repository and identify:
-- Architectural patterns (microservices, monolith, serverless, event-driven, hexagonal, clean architecture, etc.)
-- Design patterns mentioned or evident (repository pattern, factory, singleton, observer, etc.)
-- Infrastructure approach (containerized, cloud-native, kubernetes, serverless, etc.)
-- Notable frameworks or libraries
-
-Return JSON with this exact structure:
-{{
-    "architectural_patterns": [{{"name": "pattern name", "confidence": 0.0-1.0}}],
-    "design_patterns": [{{"name": "pattern name", "confidence": 0.0-1.0}}],
-    "infrastructure": [{{"approach": "approach name", "confidence": 0.0-1.0}}],
-    "frameworks": ["framework1", "framework2"],
-    "summary": "Brief 1-2 sentence summary of the architecture"
-}}
-
-{context}"""
-                }
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": context}
             ],
             max_tokens=1500,
-            temperature=0.3
+            temperature=0,
+            prompt_cache_key=PROMPT_CACHE_KEY
         )
 
-        result_text = response.choices[0].message.content
-        result_data = json.loads(result_text)
+        message = response.choices[0].message
+        if message.parsed is None:
+            raise ValueError(f"Model returned no analysis: {message.refusal or 'empty response'}")
         
-        return AnalysisResult(**result_data)
+        result = message.parsed
+        self._store_cached(cache_key, result)
+        return result
+
+    def _cache_key(self, repo_name: str, readme_content: str, file_tree: Optional[list[str]]) -> str:
+        """Hash the model, prompt version and the exact content sent to it."""
+        payload = repo_name + "|" + readme_content[:8000] + "|" + "\n".join((file_tree or [])[:100])
+        return hashlib.sha256(f"{self.model}|{PROMPT_CACHE_KEY}|{payload}".encode("utf-8")).hexdigest()
+
+    def _get_cached(self, cache_key: str) -> Optional[AnalysisResult]:
+        """Look up a previously stored analysis result."""
+        with SessionLocal() as db:
+            entry = db.get(AnalysisCache, cache_key)
+            if entry:
+                return AnalysisResult.model_validate_json(entry.result_json)
+        return None
+
+    def _store_cached(self, cache_key: str, result: AnalysisResult) -> None:
+        """Persist an analysis result; caching failures never fail the analysis."""
+        with SessionLocal() as db:
+            try:
+                db.merge(AnalysisCache(key=cache_key, result_json=result.model_dump_json()))
+                db.commit()
+            except SQLAlchemyError as e:
+                db.rollback()
+                print(f"Failed to cache analysis result: {e}")
 
     def analyze_with_heuristics(self, file_tree: list[str]) -> dict:
         """
@@ -93,14 +160,23 @@ Return JSON with this exact structure:
         """
         patterns = {}
         file_set = set(f.lower() for f in file_tree)
-        file_str = " ".join(file_tree).lower()
+        
+        # Tokens from every path component, and separately from directory components only
+        tokens = set()
+        dir_tokens = set()
+        for path in file_tree:
+            components = path.split("/")
+            for component in components[:-1]:
+                dir_tokens.update(_component_tokens(component))
+            tokens.update(_component_tokens(components[-1]))
+        tokens |= dir_tokens
 
         # Microservices indicators
-        if any(x in file_str for x in ["services/", "microservices/", "api-gateway"]):
+        if dir_tokens & MICROSERVICES_DIR_INDICATORS or tokens & MICROSERVICES_INDICATORS:
             patterns["microservices"] = 0.7
         
         # Event-driven indicators
-        if any(x in file_str for x in ["kafka", "rabbitmq", "event", "message", "queue"]):
+        if tokens & EVENT_DRIVEN_INDICATORS:
             patterns["event-driven"] = 0.6
         
         # Containerization
@@ -108,19 +184,21 @@ Return JSON with this exact structure:
             patterns["containerized"] = 0.9
         
         # Kubernetes
-        if any("kubernetes" in f or "k8s" in f or "helm" in f for f in file_tree):
+        if tokens & KUBERNETES_INDICATORS:
             patterns["kubernetes"] = 0.85
         
         # Clean/Hexagonal architecture
-        if all(x in file_str for x in ["domain", "application", "infrastructure"]):
+        if CLEAN_ARCHITECTURE_INDICATORS <= tokens:
             patterns["clean-architecture"] = 0.7
         
         # Serverless
-        if any(x in file_str for x in ["serverless", "lambda", "functions/"]):
+        if dir_tokens & SERVERLESS_DIR_INDICATORS or tokens & SERVERLESS_INDICATORS:
             patterns["serverless"] = 0.75
 
         return patterns
 
 
-# Singleton instance
-analysis_service = AnalysisService()
+@lru_cache
+def get_analysis_service() -> AnalysisService:
+    """Return the shared AnalysisService, creating its API client on first use."""
+    return AnalysisService()
@@ -1,19 +1,71 @@
 """GitHub API integration service."""
 
 import base64
-from typing import Optional
-from github import Github, GithubException
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Optional
+import httpx
+from cachetools import TTLCache
+from github import Github, GithubException, GithubRetry
 from github.Repository import Repository as GithubRepo
 
 from app.config import settings
 
+GRAPHQL_URL = "https://api.github.com/graphql"
+GRAPHQL_MAX_PAGE_SIZE = 100
+HTTP_POOL_SIZE = 20  # fixed pool size shared by the PyGithub session and the httpx GraphQL client
+
+# Fetches every field _repo_to_dict needs in a single request
+SEARCH_REPOSITORIES_QUERY = """
+query($query: String!, $first: Int!) {
+  search(query: $query, type: REPOSITORY, first: $first) {
+    nodes {
+      ... on Repository {
+        name
+        nameWithOwner
+        url
+        primaryLanguage { name }
+        stargazerCount
+        description
+      }
+    }
+  }
+}
+"""
+
 
 class GitHubService:
     """Service for interacting with GitHub API."""
 
     def __init__(self, token: Optional[str] = None):
         self.token = token or settings.GITHUB_TOKEN
-        self.client = Github(self.token) if self.token else Github()
+        # PyGithub keeps one keep-alive requests.Session; size its pool and keep retries short
+        retry = GithubRetry(total=3, backoff_factor=0.3)
+        if self.token:
+            self.client = Github(self.token, retry=retry, pool_size=HTTP_POOL_SIZE)
+        else:
+            self.client = Github(retry=retry, pool_size=HTTP_POOL_SIZE)
+        # Reused client for GraphQL calls so every request after the first skips the TLS handshake
+        self.http = httpx.Client(
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE),
+            transport=httpx.HTTPTransport(retries=3)
+        )
+        # Short-lived cache of API responses keyed by (method, full_name, *args)
+        self._cache = TTLCache(maxsize=1024, ttl=settings.GITHUB_CACHE_TTL)
+        self._cache_lock = threading.Lock()
+
+    def _cached(self, key: tuple, fetch: Callable[[], Any]) -> Any:
+        """Return a cached value for key, calling fetch on a miss. Empty results are not cached."""
+        with self._cache_lock:
+            if key in self._cache:
+                return self._cache[key]
+        
+        value = fetch()
+        if value:
+            with self._cache_lock:
+                self._cache[key] = value
+        return value
 
     def search_repositories(
         self,
@@ -47,6 +99,50 @@ class GitHubService:
         
         search_query = " ".join(search_parts)
         
+        # GraphQL requires authentication; one call returns up to 100 fully populated results
+        if self.token and max_results <= GRAPHQL_MAX_PAGE_SIZE:
+            results = self._search_repositories_graphql(search_query, max_results)
+            if results is not None:
+                return results
+        
+        return self._search_repositories_rest(search_query, max_results)
+
+    def _search_repositories_graphql(self, search_query: str, max_results: int) -> Optional[list[dict]]:
+        """Run a repository search with one GraphQL request. Returns None if the request fails."""
+        try:
+            response = self.http.post(
+                GRAPHQL_URL,
+                json={
+                    "query": SEARCH_REPOSITORIES_QUERY,
+                    "variables": {"query": f"{search_query} sort:stars-desc", "first": max_results},
+                },
+                headers={"Authorization": f"bearer {self.token}"}
+            )
+            response.raise_for_status()
+            payload = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"GitHub GraphQL error: {e}")
+            return None
+        
+        if payload.get("errors") or not payload.get("data"):
+            print(f"GitHub GraphQL error: {payload.get('errors')}")
+            return None
+        
+        return [
+            {
+                "name": node["name"],
+                "full_name": node["nameWithOwner"],
+                "url": node["url"],
+                "language": (node.get("primaryLanguage") or {}).get("name"),
+                "stars": node["stargazerCount"],
+                "description": node.get("description") or "",
+            }
+            for node in payload["data"]["search"]["nodes"]
+            if node  # non-repository nodes come back empty
+        ]
+
+    def _search_repositories_rest(self, search_query: str, max_results: int) -> list[dict]:
+        """Run a repository search through the paginated REST API."""
         results = []
         try:
             repos = self.client.search_repositories(
@@ -81,6 +177,10 @@ class GitHubService:
         Returns:
             Repository metadata dictionary or None
         """
+        return self._cached(("repository", full_name), lambda: self._fetch_repository(full_name))
+
+    def _fetch_repository(self, full_name: str) -> Optional[dict]:
+        """Fetch repository metadata from the GitHub API (uncached)."""
         try:
             repo = self.client.get_repo(full_name)
             return self._repo_to_dict(repo)
@@ -98,6 +198,10 @@ class GitHubService:
         Returns:
             README content as string or None
         """
+        return self._cached(("readme", full_name), lambda: self._fetch_readme_content(full_name))
+
+    def _fetch_readme_content(self, full_name: str) -> Optional[str]:
+        """Fetch and decode the README from the GitHub API (uncached)."""
         try:
             repo = self.client.get_repo(full_name)
             readme = repo.get_readme()
@@ -118,6 +222,32 @@ class GitHubService:
         Returns:
             List of file/folder paths
         """
+        return self._cached(
+            ("file_tree", full_name, path, depth),
+            lambda: self._fetch_file_tree(full_name, path, depth)
+        )
+
+    def _fetch_file_tree(self, full_name: str, path: str, depth: int) -> list[str]:
+        """Fetch the whole tree in one Git Data API call and trim it to the requested depth (uncached)."""
+        try:
+            repo = self.client.get_repo(full_name)
+            tree = repo.get_git_tree(repo.default_branch, recursive=True)
+        except GithubException:
+            return self._walk_contents(full_name, path, depth)
+        
+        # Truncated trees may be missing shallow entries, so walk the contents instead
+        if tree.truncated:
+            return self._walk_contents(full_name, path, depth)
+        
+        prefix = f"{path.strip('/')}/" if path else ""
+        base_depth = prefix.count("/")
+        return [
+            entry.path for entry in tree.tree
+            if entry.path.startswith(prefix) and entry.path.count("/") - base_depth <= depth
+        ]
+
+    def _walk_contents(self, full_name: str, path: str, depth: int) -> list[str]:
+        """Walk the repository contents one directory per request."""
         try:
             repo = self.client.get_repo(full_name)
             contents = repo.get_contents(path)
@@ -126,7 +256,7 @@ class GitHubService:
             for content in contents:
                 paths.append(content.path)
                 if content.type == "dir" and depth > 0:
-                    paths.extend(self.get_file_tree(full_name, content.path, depth - 1))
+                    paths.extend(self._walk_contents(full_name, content.path, depth - 1))
             
             return paths
         except GithubException:
@@ -144,5 +274,7 @@ class GitHubService:
         }
 
 
-# Singleton instance
-github_service = GitHubService()
+@lru_cache
+def get_github_service() -> GitHubService:
+    """Return the shared GitHubService, creating its API client on first use."""
+    return GitHubService()
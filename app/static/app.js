@@ -249,7 +249,12 @@ async function ingestRepo(fullName, button) {
         button.style.borderColor = 'var(--success)';
         button.style.color = '#fff';
         
-        showToast(`${repo} analyzed and indexed!`, 'success');
+        // 202 means the repo is stored and GPT-5 analysis is still running
+        if (res.status === 202) {
+            showToast(`${repo} indexed, analysis running in the background`, 'success');
+        } else {
+            showToast(`${repo} analyzed and indexed!`, 'success');
+        }
         
     } catch (err) {
         button.disabled = false;
@@ -0,0 +1,111 @@
+"""Parity tests for /api/search scoring against the original Python scorer."""
+
+import os
+import tempfile
+
+import pytest
+
+# The engine is created at import time, so point it at a throwaway database first
+_DB_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/test.db"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database import SessionLocal, Repository, ArchitectureTag, init_db  # noqa: E402
+from app.main import app  # noqa: E402
+
+REPOS = [
+    {
+        "full_name": "o/events",
+        "language": "Python",
+        "description": "Système Événementiel",
+        "tags": [("ÉVÉNEMENT", 0.9), ("Événement", 0.9), ("Microservices", 0.4)],
+    },
+    {
+        "full_name": "o/cafe",
+        "language": "Élixir",
+        "description": "Café ordering API with event sourcing",
+        "tags": [("Event-Driven", 0.7), ("CQRS", 0.8)],
+    },
+    {
+        "full_name": "o/plain",
+        "language": "Go",
+        "description": "Plain microservices platform",
+        "tags": [("microservices", 0.6), ("Kubernetes", 1.0)],
+    },
+    {
+        "full_name": "o/none",
+        "language": None,
+        "description": None,
+        "tags": [("Ü", 0.5)],
+    },
+]
+
+
+def baseline_score(repo: dict, terms: list[str], min_confidence: float) -> float:
+    """The original per-repository scoring loop from search_by_architecture."""
+    score = 0.0
+    for tag, confidence in repo["tags"]:
+        if confidence < min_confidence:
+            continue
+        tag_lower = tag.lower()
+        for term in terms:
+            if term in tag_lower or tag_lower in term:
+                score += confidence
+    if repo["language"] and repo["language"].lower() in terms:
+        score += 0.5
+    if repo["description"]:
+        desc_lower = repo["description"].lower()
+        for term in terms:
+            if term in desc_lower:
+                score += 0.2
+    return score
+
+
+@pytest.fixture(scope="module")
+def client():
+    init_db()
+    with SessionLocal() as db:
+        for data in REPOS:
+            repo = Repository(
+                name=data["full_name"].split("/")[1],
+                full_name=data["full_name"],
+                url="https://example.com",
+                language=data["language"],
+                description=data["description"],
+            )
+            db.add(repo)
+            db.flush()
+            for tag, confidence in data["tags"]:
+                db.add(ArchitectureTag(repo_id=repo.id, tag=tag, confidence_score=confidence))
+        db.commit()
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.mark.parametrize("query", [
+    "événement",
+    "ÉVÉNEMENT système",
+    "élixir",
+    "café event",
+    "ü",
+    "microservices go",
+    "kubernetes cqrs",
+    "nothing-matches",
+])
+@pytest.mark.parametrize("min_confidence", [0.0, 0.5])
+def test_search_scores_match_baseline(client, query, min_confidence):
+    terms = query.lower().split()
+    expected = {
+        repo["full_name"]: baseline_score(repo, terms, min_confidence)
+        for repo in REPOS
+        if baseline_score(repo, terms, min_confidence) > 0
+    }
+
+    response = client.get("/api/search", params={"query": query, "min_confidence": min_confidence})
+    assert response.status_code == 200
+    actual = {item["repository"]["full_name"]: item["relevance_score"] for item in response.json()}
+
+    assert actual.keys() == expected.keys()
+    for full_name, score in expected.items():
+        assert actual[full_name] == pytest.approx(score)